@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
+import os
 import json
+import asyncio
 import asyncpraw
 import logging
 
 from typing import Tuple
+from collections import OrderedDict
 from asyncpraw.models import Submission, Comment
 
 __all__ = [
@@ -15,6 +18,24 @@ __all__ = [
     'LoggerHandler'
 ]
 
+# Parsed credentials files as (mtime, creds) keyed by path so that
+# readers sharing a file don't re-read it on every connect.
+_AUTH_CACHE = {}
+
+# Tested asyncpraw.Reddit instances as (loop, auth, connection) keyed by
+# (username, client_id), so that every reader for an account shares one
+# session and token. A client is bound to the loop that made it.
+_CONNECTIONS = {}
+
+# Clients as (loop, connection) that readers may still be using but that
+# are not shared: replaced by newer credentials or failed their test.
+# close_connections closes these along with the shared ones.
+_UNSHARED_CONNECTIONS = []
+
+# Number of recently seen item ids a reader remembers
+# to drop items the stream delivers more than once.
+_SEEN_MAX = 4096
+
 
 class Filter():
     """
@@ -23,9 +44,16 @@ class Filter():
 
     def __init__(self, name='()'):
         self.name = name
-        self.filters = []
+        self._filters = {}
+        self._filters_tuple = ()
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def filters(self) -> tuple:
+        """Read-only view of the rules, use add_rule and remove_rule"""
+
+        return self._filters_tuple
+
     def add_rule(self, filter):
         """
         Adds a filter to this object. A filter must be callable,
@@ -40,14 +68,36 @@ class Filter():
 
         """
 
-        if filter not in self.filters and callable(filter):
-            self.filters.append(filter)
+        if callable(filter) and self.__find_rule(filter) is None:
+            try:
+                self._filters[filter] = filter
+            except TypeError:
+                # Unhashable rules are stored by identity instead
+                self._filters[id(filter)] = filter
+            self._filters_tuple = tuple(self._filters.values())
 
     def remove_rule(self, filter):
         """Removes the filter from this object"""
 
-        if filter in self.filters:
-            self.filters.remove(filter)
+        key = self.__find_rule(filter)
+        if key is not None:
+            del self._filters[key]
+            self._filters_tuple = tuple(self._filters.values())
+
+    def __find_rule(self, filter):
+        """
+        Returns the key the filter is stored under, or None if
+        this object has no such filter.
+        """
+
+        try:
+            return filter if filter in self._filters else None
+        except TypeError:
+            # Unhashable rules fall back to an equality scan
+            for key, f in self._filters.items():
+                if f == filter:
+                    return key
+            return None
 
     def test(self, item: Tuple[Submission, Comment]) -> bool:
         """
@@ -60,10 +110,9 @@ class Filter():
         Returns True if the item is caught by the filter.
         """
 
-        for f in self.filters:
-            if not f.filter(item):
-                self.logger.debug(f'item {item.id} blocked by "{self.name}"')
-                return True
+        if any(f(item) for f in self._filters_tuple):
+            self.logger.debug('item %s blocked by "%s"', item.id, self.name)
+            return True
         return False
 
 
@@ -71,8 +120,10 @@ class BaseReader(Filter):
     """
     Async PRAW Wrapper that monitors submissions or comments.
 
-    connect:    Creates an authenticated instance of asyncpraw.Reddit
-                Called automatically by constructor.
+    connect:    Creates an authenticated instance of asyncpraw.Reddit,
+                or reuses the one already made for the same account.
+                A shared connection must not be closed by one reader,
+                use close_connections once all readers are done.
 
     monitor:    Monitor a subreddit for submissions or comments.
                 Should be overridden by a subclass
@@ -82,8 +133,13 @@ class BaseReader(Filter):
         super().__init__(**kwargs)
         self.logger = logging.getLogger(__name__)
         self.credentials_path = credentials_path
-        self.handlers = []
+        self.connection = None
+        self._handlers = []
+        self._handlers_tuple = ()
+        self._handle_funcs = ()
         self.run = True
+        self.skip_authors = frozenset()
+        self._seen = OrderedDict()
 
     def __get_auth(self, credentials_path: str = None) -> dict:
         """
@@ -96,12 +152,19 @@ class BaseReader(Filter):
         if credentials_path is None:
             credentials_path = './config/auth.json'
 
-        # Read authentication file from OS
-        with open(credentials_path, 'r') as f:
-            creds = json.load(f)
-
+        # Read authentication file from OS unless unchanged since last read
+        mtime = os.stat(credentials_path).st_mtime_ns
+        cached = _AUTH_CACHE.get(credentials_path)
+        if cached is not None and cached[0] == mtime:
+            creds = cached[1]
+        else:
+            with open(credentials_path, 'r') as f:
+                creds = json.load(f)
+            _AUTH_CACHE[credentials_path] = (mtime, creds)
+
+        # Reddit usernames are case-insensitive, compare lowercased
         username = creds['Reddit']['username']
-        self.skip_authors = [username, 'AutoModerator']
+        self.skip_authors = frozenset([username.lower(), 'automoderator'])
 
         # Return the configuration that should pass to Reddit
         return {
@@ -112,27 +175,120 @@ class BaseReader(Filter):
             'user_agent':    creds['Praw']['user_agent']
         }
 
+    @property
+    def handlers(self) -> tuple:
+        """Read-only view of the handlers, see add_handler"""
+
+        return self._handlers_tuple
+
     def add_handler(self, handler):
         """Adds a handler to the monitoring worker"""
 
-        self.handlers.append(handler)
+        self._handlers.append(handler)
+        self._handlers_tuple = tuple(self._handlers)
+        self._handle_funcs = tuple(h.handle for h in self._handlers_tuple)
+
+    def remove_handler(self, handler):
+        """Removes the handler from the monitoring worker"""
+
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            self._handlers_tuple = tuple(self._handlers)
+            self._handle_funcs = tuple(
+                h.handle for h in self._handlers_tuple)
 
     async def connect(self):
-        """Creates an authenticated connection to Reddit"""
+        """
+        Creates an authenticated connection to Reddit
+
+        The connection is shared with every reader on this event loop
+        that uses the same credentials, so it must not be closed here.
+        """
+
+        auth = self.__get_auth(self.credentials_path)
+        loop = asyncio.get_running_loop()
+        key = (auth['username'], auth['client_id'])
+
+        # Reuse the connection another reader made with these credentials
+        cached = _CONNECTIONS.get(key)
+        if cached is not None and cached[0] is loop and cached[1] == auth:
+            self.connection = cached[2]
+            return
 
         # Authenticate using the passed in details
-        self.connection = asyncpraw.Reddit(
-            **self.__get_auth(self.credentials_path)
-        )
+        self.connection = asyncpraw.Reddit(**auth)
 
         # Test the connection by getting one post
         try:
             subreddit = await self.connection.subreddit('all')
             async for sub in subreddit.new(limit=3):
-                msg = f'Connection tested with {sub.id}: {sub.title}'
-                self.logger.debug(msg)
+                self.logger.debug(
+                    'Connection tested with %s: %s', sub.id, sub.title)
         except Exception:
+            # Keep the client for this reader but don't share it
             self.logger.exception('Failed to connect.')
+            _UNSHARED_CONNECTIONS.append((loop, self.connection))
+            return
+
+        # Another reader may have stored a connection while this one
+        # was tested, use theirs if the credentials match
+        cached = _CONNECTIONS.get(key)
+        if cached is not None and cached[0] is loop and cached[1] == auth:
+            await self.connection.close()
+            self.connection = cached[2]
+            return
+
+        # Readers may still use a connection with outdated credentials
+        if cached is not None:
+            _UNSHARED_CONNECTIONS.append((cached[0], cached[2]))
+
+        _CONNECTIONS[key] = (loop, auth, self.connection)
+
+    @staticmethod
+    async def close_connections():
+        """
+        Closes every connection readers made on this event loop.
+
+        Connections made on loops that have since closed are dropped.
+        """
+
+        loop = asyncio.get_running_loop()
+        entries = [(lp, c) for lp, _, c in _CONNECTIONS.values()]
+        entries.extend(_UNSHARED_CONNECTIONS)
+        _CONNECTIONS.clear()
+        _UNSHARED_CONNECTIONS.clear()
+
+        for lp, connection in entries:
+            if lp is loop:
+                await connection.close()
+            elif not lp.is_closed():
+                _UNSHARED_CONNECTIONS.append((lp, connection))
+
+    def _is_skipped(self, item: Tuple[Submission, Comment]) -> bool:
+        """
+        Determines if the item is from an author this reader ignores.
+
+        Returns True for deleted authors, this bot and AutoModerator.
+        """
+
+        author = item.author
+        return author is None or author.name.lower() in self.skip_authors
+
+    def _is_duplicate(self, item: Tuple[Submission, Comment]) -> bool:
+        """
+        Determines if the item was recently seen by this reader.
+
+        Returns True if the item id was already seen.
+        Returns False and remembers the id otherwise.
+        """
+
+        if item.id in self._seen:
+            return True
+
+        self._seen[item.id] = None
+        if len(self._seen) > _SEEN_MAX:
+            self._seen.popitem(last=False)
+        return False
 
     def monitor(self, subreddit):
         """Monitors submissions or comments for the subreddit"""
@@ -202,7 +358,7 @@ class CommentReader(BaseReader):
         Yields comments as they come in until instructed to stop.
         """
 
-        self.logger.debug(f'Monitoring comments in {subreddit}')
+        self.logger.debug('Monitoring comments in %s', subreddit)
         subreddit = self.connection.subreddit(subreddit)
         args = self.stream_args(**kwargs)
         stream = subreddit.stream.comments(**args)
@@ -215,16 +371,23 @@ class CommentReader(BaseReader):
                 self.__log_type_warning(Comment(), comment)
                 continue
 
+            # Drop items from ignored authors before any other work
+            if self._is_skipped(comment):
+                continue
+
+            # Drop items the stream has already delivered
+            if self._is_duplicate(comment):
+                continue
+
             # Check filters
-            for f in self.filters:
-                if f.test(comment):
-                    continue
+            if self.test(comment):
+                continue
 
-            self.logger.info(f'Handling comment: {comment.id}')
+            self.logger.info('Handling comment: %s', comment.id)
 
             # Invoke handlers
-            for h in self.handlers:
-                h.handle(comment)
+            for handle in self._handle_funcs:
+                handle(comment)
 
 
 class SubmissionReader(BaseReader):
@@ -245,7 +408,7 @@ class SubmissionReader(BaseReader):
         Yields submissions as they come in until instructed to stop.
         """
 
-        self.logger.debug(f'Monitoring submissions in {subreddit}')
+        self.logger.debug('Monitoring submissions in %s', subreddit)
         subreddit = await self.connection.subreddit(subreddit)
         args = self.stream_args(**kwargs)
         stream = subreddit.stream.submissions(**args)
@@ -259,16 +422,23 @@ class SubmissionReader(BaseReader):
                 self.__log_type_warning(Submission(), submission)
                 continue
 
+            # Drop items from ignored authors before any other work
+            if self._is_skipped(submission):
+                continue
+
+            # Drop items the stream has already delivered
+            if self._is_duplicate(submission):
+                continue
+
             # Check filters
-            for f in self.filters:
-                if f.test(submission):
-                    continue
+            if self.test(submission):
+                continue
 
-            self.logger.info(f'Handling submission: {submission.id}')
+            self.logger.info('Handling submission: %s', submission.id)
 
             # Invoke each handler
-            for h in self.handlers:
-                h.handle(submission)
+            for handle in self._handle_funcs:
+                handle(submission)
 
     def __log_type_warning(self, wanted, got):
         """
@@ -279,9 +449,8 @@ class SubmissionReader(BaseReader):
             got    -- the type we actually got
         """
 
-        MSG = 'Expected {wt} but got {gt}'
-        self.logger.warning(MSG.format(
-            wt=type(wanted), gt=type(got)))
+        self.logger.warning(
+            'Expected %s but got %s', type(wanted), type(got))
 
 
 class LoggerHandler(BaseHandler):
@@ -298,4 +467,4 @@ class LoggerHandler(BaseHandler):
             self.logger = logger
 
     def __handler_action(self, item: Tuple[Submission, Comment]):
-        self.logger.debug(f'handled item {item.id}')
+        self.logger.debug('handled item %s', item.id)